@@ -3,7 +3,20 @@
 pydocstyle docstrings convention needs error code and class parser for be
 included as module into flake8
 """
+import os
 import re
+import sys
+
+
+def _parse_version(version):
+    """Return the numeric release part of ``version`` as a tuple.
+
+    Suffixes such as the "rc1" of "6.3.0rc1" are ignored so that
+    pre-releases do not break the import.
+    """
+    release = re.match(r"\d+(?:\.\d+)*", version).group()
+    return tuple(int(num) for num in release.split("."))
+
 
 supports_ignore_inline_noqa = False
 supports_property_decorators = False
@@ -13,9 +26,7 @@ try:
 
     module_name = "pydocstyle"
 
-    pydocstyle_version = tuple(
-        int(num) for num in pep257.__version__.split(".")
-    )
+    pydocstyle_version = _parse_version(pep257.__version__)
     supports_ignore_inline_noqa = pydocstyle_version >= (6, 0, 0)
     supports_property_decorators = pydocstyle_version >= (6, 2, 0)
     supports_ignore_self_only_init = pydocstyle_version >= (6, 3, 0)
@@ -27,24 +38,122 @@ except ImportError:
 __version__ = "1.7.0"
 __all__ = ("pep257Checker",)
 
+_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "flake8-docstrings",
+)
+_CACHE_EXPIRE = 24 * 60 * 60
+_CACHE_MAX_ENTRIES = 2000
+_RESULT_CACHE = None
+_CACHE_ERRORS = ()
+_SOURCE_HASH = None
+
+
+def _get_result_cache():
+    """Return the persistent result cache or None when it is unavailable.
+
+    The cache modules are only imported here so that runs without
+    --docstring-cache do not pay for them.
+    """
+    global _RESULT_CACHE, _CACHE_ERRORS
+    if _RESULT_CACHE is None:
+        _RESULT_CACHE = False
+        try:
+            import sqlite3
+
+            import diskcache
+        except ImportError:
+            diskcache = None
+        if diskcache is not None:
+            _CACHE_ERRORS = (OSError, sqlite3.Error, diskcache.Timeout)
+            try:
+                _RESULT_CACHE = diskcache.Cache(
+                    _CACHE_DIRECTORY,
+                    eviction_policy="least-recently-stored",
+                )
+            except _CACHE_ERRORS:
+                pass
+    # An empty diskcache.Cache is falsy, so compare against the sentinel.
+    return _RESULT_CACHE if _RESULT_CACHE is not False else None
+
+
+def _source_digest(source):
+    global _SOURCE_HASH
+    if _SOURCE_HASH is None:
+        try:
+            from blake3 import blake3 as _SOURCE_HASH
+        except ImportError:
+            from hashlib import blake2b as _SOURCE_HASH
+    return _SOURCE_HASH(source.encode("utf-8", "surrogatepass")).digest()
+
+
+def _disable_result_cache():
+    global _RESULT_CACHE
+    _RESULT_CACHE = False
+
+
+def _disk_cache_get(key):
+    cache = _get_result_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except _CACHE_ERRORS:
+        _disable_result_cache()
+        return None
+
+
+def _disk_cache_set(key, results):
+    cache = _get_result_cache()
+    if cache is None:
+        return
+    try:
+        # set() keeps the rowid of an existing entry and peekitem() orders
+        # by rowid, so delete first to make a re-stored entry the newest.
+        cache.delete(key)
+        cache.set(key, results, expire=_CACHE_EXPIRE)
+        while len(cache) > _CACHE_MAX_ENTRIES:
+            try:
+                oldest, _ = cache.peekitem(last=False)
+            except KeyError:
+                break
+            cache.delete(oldest)
+    except _CACHE_ERRORS:
+        _disable_result_cache()
+
+
+def _compile_ignore_decorators(pattern, use_re2):
+    """Compile ``pattern``, with re2 if requested and possible.
+
+    re2 matches in linear time but does not support every construct of the
+    re module, such as backreferences and lookarounds, and its shorthand
+    character classes only match ASCII characters.  Patterns it cannot
+    compile fall back to re.
+    """
+    if use_re2:
+        try:
+            import re2
+
+            options = re2.Options()
+        except (ImportError, AttributeError):
+            re2 = None
+        if re2 is not None:
+            options.log_errors = False
+            try:
+                return re2.compile(pattern, options)
+            except re2.error:
+                pass
+    return re.compile(pattern)
+
 
 class _ContainsAll:
+    __slots__ = ()
+
     def __contains__(self, code):  # type: (str) -> bool
         return True
 
 
-class EnvironError(pep257.Error):
-    def __init__(self, err):
-        super().__init__(
-            code="D998",
-            short_desc="EnvironmentError: " + str(err),
-            context=None,
-        )
-
-    @property
-    def line(self):
-        """Return 0 as line number for EnvironmentError."""
-        return 0
+_CONTAINS_ALL = _ContainsAll()
 
 
 class AllError(pep257.Error):
@@ -55,24 +164,52 @@ class AllError(pep257.Error):
             context=None,
         )
 
-    @property
-    def line(self):
-        """pep257.AllError does not contain line number. Return 0 instead."""
-        return 0
+    # pep257.AllError does not contain a line number.
+    line = 0
 
 
 class pep257Checker:
     """Flake8 needs a class to check python file."""
 
+    __slots__ = ("filename", "_lines", "_source")
+
     name = "flake8-docstrings"
     version = f"{__version__}, {module_name}: {pep257.__version__}"
 
+    _CHOICES = tuple(sorted(pep257.conventions)) + ("all",)
+
+    # Defaults for options that only exist with some pydocstyle versions, so
+    # the checker never needs to test whether they were set.
+    property_decorators = None
+    ignore_self_only_init = False
+    docstring_cache = False
+    _checker = None
+
     def __init__(self, tree, filename, lines):
-        """Initialize the checker."""
-        self.tree = tree
+        """Initialize the checker.
+
+        flake8 picks the plugin arguments from this signature, so ``tree`` is
+        accepted but not kept: pydocstyle parses the source on its own.
+        """
         self.filename = filename
-        self.checker = pep257.ConventionChecker()
-        self.source = "".join(lines)
+        self._lines = lines
+        self._source = None
+
+    @property
+    def source(self):
+        """Return the checked source, joining flake8's lines on first use."""
+        if self._source is None:
+            self._source = "".join(self._lines)
+        return self._source
+
+    @classmethod
+    def _get_checker(cls):
+        # ConventionChecker keeps no per-file state besides the options
+        # check_source is called with, which are the same for every file.
+        checker = cls._checker
+        if checker is None:
+            checker = cls._checker = pep257.ConventionChecker()
+        return checker
 
     @classmethod
     def add_options(cls, parser):
@@ -82,7 +219,7 @@ class pep257Checker:
             action="store",
             parse_from_config=True,
             default="pep257",
-            choices=sorted(pep257.conventions) + ["all"],
+            choices=cls._CHOICES,
             help=(
                 "pydocstyle docstring convention, default 'pep257'. "
                 "Use the special value 'all' to enable all codes (note: "
@@ -103,6 +240,16 @@ class pep257Checker:
                 "The default is not ignore any decorated functions. "
             ),
         )
+        parser.add_option(
+            "--ignore-decorators-re2",
+            action="store_true",
+            parse_from_config=True,
+            help=(
+                "match --ignore-decorators with google-re2 when it is "
+                "installed. re2 runs in linear time, but its \\w, \\d and "
+                "\\s only match ASCII characters."
+            ),
+        )
 
         if supports_property_decorators:
             from pydocstyle.config import ConfigurationParser
@@ -131,12 +278,25 @@ class pep257Checker:
                 help="ignore __init__ methods which only have a self param.",
             )
 
+        parser.add_option(
+            "--docstring-cache",
+            action="store_true",
+            parse_from_config=True,
+            help=(
+                "cache results on disk so unchanged files are not checked "
+                "again; requires diskcache, default False."
+            ),
+        )
+
     @classmethod
     def parse_options(cls, options):
         """Parse the configuration options given to flake8."""
         cls.convention = options.docstring_convention
+        cls.docstring_cache = options.docstring_cache
         cls.ignore_decorators = (
-            re.compile(options.ignore_decorators)
+            _compile_ignore_decorators(
+                options.ignore_decorators, options.ignore_decorators_re2
+            )
             if options.ignore_decorators
             else None
         )
@@ -145,48 +305,111 @@ class pep257Checker:
         if supports_ignore_self_only_init:
             cls.ignore_self_only_init = options.ignore_self_only_init
 
-    def _call_check_source(self):
-        check_source_kwargs = {}
+        # These only depend on the options, so compute them once per flake8
+        # invocation rather than once per checked file.
+        if cls.convention == "all":
+            cls._checked_codes = _CONTAINS_ALL
+        else:
+            cls._checked_codes = frozenset(
+                pep257.conventions[cls.convention]
+            ) | {"D999"}
+        cls._base_kwargs = {"ignore_decorators": cls.ignore_decorators}
         if supports_ignore_inline_noqa:
-            check_source_kwargs["ignore_inline_noqa"] = True
+            cls._base_kwargs["ignore_inline_noqa"] = True
         if supports_property_decorators:
-            check_source_kwargs["property_decorators"] = (
-                set(self.property_decorators.split(","))
-                if self.property_decorators
+            cls._base_kwargs["property_decorators"] = (
+                frozenset(cls.property_decorators.split(","))
+                if cls.property_decorators
                 else None
             )
         if supports_ignore_self_only_init:
-            check_source_kwargs[
+            cls._base_kwargs[
                 "ignore_self_only_init"
-            ] = self.ignore_self_only_init
+            ] = cls.ignore_self_only_init
+
+        # When --select only names codes that cannot come from this plugin,
+        # every result would be discarded by flake8 so skip the check.
+        from flake8 import defaults
+
+        select = getattr(options, "select", None)
+        if select and set(select) != set(getattr(defaults, "SELECT", ())):
+            extend_select = getattr(options, "extend_select", None) or []
+            cls._any_d_selected = any(
+                code.startswith("D") for code in [*select, *extend_select]
+            )
+        else:
+            cls._any_d_selected = True
 
-        return self.checker.check_source(
+    def _call_check_source(self):
+        return self._get_checker().check_source(
             self.source,
             self.filename,
-            ignore_decorators=self.ignore_decorators,
-            **check_source_kwargs,
+            **type(self)._base_kwargs,
         )
 
-    def _check_source(self):
-        try:
-            for err in self._call_check_source():
-                yield err
-        except pep257.AllError as err:
-            yield AllError(err)
-        except OSError as err:
-            yield EnvironError(err)
+    def _cache_key(self):
+        cls = type(self)
+        source_key = _source_digest(self.source)
+        ignore_decorators = cls.ignore_decorators
+        if ignore_decorators is not None:
+            # re and re2 can match the same pattern differently.
+            ignore_decorators = (
+                type(ignore_decorators).__module__,
+                ignore_decorators.pattern,
+            )
+        return (
+            source_key,
+            self.filename,
+            cls.convention,
+            ignore_decorators,
+            cls.property_decorators,
+            cls.ignore_self_only_init,
+            # pydocstyle compares the file's parents with sys.path to find
+            # out whether the module is inside a private package.
+            tuple(sys.path),
+            __version__,
+            pep257.__version__,
+        )
 
     def run(self):
-        """Use directly check() api from pydocstyle."""
-        if self.convention == "all":
-            checked_codes = _ContainsAll()
-        else:
-            checked_codes = pep257.conventions[self.convention] | {
-                "D998",
-                "D999",
-            }
-        for error in self._check_source():
-            if isinstance(error, pep257.Error) and error.code in checked_codes:
-                # NOTE(sigmavirus24): Fixes GitLab#3
-                message = f"{error.code} {error.short_desc}"
-                yield (error.line, 0, message, type(self))
+        """Use directly check() api from pydocstyle.
+
+        With --docstring-cache, results are cached on disk, keyed by the
+        source contents and every option that influences them, so unchanged
+        files are not re-checked.
+        """
+        cls = type(self)
+        if not cls._any_d_selected:
+            return ()
+        if cls.docstring_cache and _get_result_cache() is not None:
+            return self._cached_results()
+        return self._results()
+
+    def _cached_results(self):
+        # Only the cache key needs the joined source up front; on a miss the
+        # same string is reused by check_source.
+        cache_key = self._cache_key()
+        results = _disk_cache_get(cache_key)
+        if results is None:
+            results = tuple(self._results())
+            _disk_cache_set(cache_key, results)
+        # The results do not reference the joined source, release it now.
+        self._source = None
+        return results
+
+    def _results(self):
+        cls = type(self)
+        checked_codes = cls._checked_codes
+        errors = self._call_check_source()
+        # check_source keeps its own reference to the source from here on.
+        self._source = None
+        try:
+            for error in errors:
+                if error.code in checked_codes:
+                    # NOTE(sigmavirus24): Fixes GitLab#3
+                    message = f"{error.code} {error.short_desc}"
+                    yield (error.line, 0, message, cls)
+        except pep257.AllError as err:
+            error = AllError(err)
+            # D999 is part of every set of checked codes.
+            yield (error.line, 0, f"{error.code} {error.short_desc}", cls)
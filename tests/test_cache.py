@@ -0,0 +1,95 @@
+"""Tests for the flake8-docstrings result cache."""
+import subprocess
+import sys
+import types
+
+import pytest
+
+import flake8_docstrings
+
+pytest.importorskip("diskcache")
+
+SOURCE = ["def f():\n", "    pass\n"]
+
+
+def _parse_options(docstring_cache):
+    options = types.SimpleNamespace(
+        docstring_cache=docstring_cache,
+        docstring_convention="pep257",
+        ignore_decorators=None,
+        ignore_decorators_re2=False,
+        property_decorators="property",
+        ignore_self_only_init=False,
+        select=None,
+        extend_select=None,
+    )
+    flake8_docstrings.pep257Checker.parse_options(options)
+
+
+@pytest.fixture
+def checker(tmp_path, monkeypatch):
+    """Return the checker class configured with an empty cache."""
+    monkeypatch.setattr(flake8_docstrings, "_CACHE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(flake8_docstrings, "_RESULT_CACHE", None)
+    _parse_options(docstring_cache=True)
+    return flake8_docstrings.pep257Checker
+
+
+def test_second_run_is_served_from_cache(checker, monkeypatch):
+    """Check that unchanged sources are not checked again."""
+    first = list(checker(None, "a.py", SOURCE).run())
+    assert [message for _, _, message, _ in first] == [
+        "D100 Missing docstring in public module",
+        "D103 Missing docstring in public function",
+    ]
+    assert len(flake8_docstrings._get_result_cache()) == 1
+
+    def fail(self):
+        raise AssertionError("check_source called on a cache hit")
+
+    monkeypatch.setattr(checker, "_call_check_source", fail)
+    assert list(checker(None, "a.py", SOURCE).run()) == first
+
+
+def test_cache_is_disabled_by_default(checker, monkeypatch):
+    """Check that nothing is cached or hashed without --docstring-cache."""
+    _parse_options(docstring_cache=False)
+
+    def fail(self):
+        raise AssertionError("cache key computed without a cache")
+
+    monkeypatch.setattr(checker, "_cache_key", fail)
+    assert len(list(checker(None, "a.py", SOURCE).run())) == 2
+    assert flake8_docstrings._RESULT_CACHE is None
+
+
+def test_cache_key_depends_on_sys_path(checker, monkeypatch):
+    """Check that module publicity changes with sys.path invalidate."""
+    key = checker(None, "a.py", SOURCE)._cache_key()
+    monkeypatch.setattr(flake8_docstrings.sys, "path", ["elsewhere"])
+    assert checker(None, "a.py", SOURCE)._cache_key() != key
+
+
+def test_cache_modules_are_imported_lazily():
+    """Check that importing the plugin does not import the cache modules."""
+    code = (
+        "import sys, flake8_docstrings; "
+        "print(sorted({'blake3', 'diskcache', 'sqlite3'} & set(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_restored_entry_is_evicted_last(checker, monkeypatch):
+    """Check that the entry stored longest ago is evicted first."""
+    monkeypatch.setattr(flake8_docstrings, "_CACHE_MAX_ENTRIES", 2)
+    flake8_docstrings._disk_cache_set("a", ())
+    flake8_docstrings._disk_cache_set("b", ())
+    flake8_docstrings._disk_cache_set("a", ())
+    flake8_docstrings._disk_cache_set("c", ())
+    assert sorted(flake8_docstrings._get_result_cache()) == ["a", "c"]
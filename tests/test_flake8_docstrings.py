@@ -0,0 +1,116 @@
+"""Tests for the flake8-docstrings option handling."""
+import re
+import subprocess
+import sys
+import types
+
+import pytest
+from flake8 import defaults
+
+import flake8_docstrings
+
+
+@pytest.mark.parametrize(
+    ("version", "expected"),
+    [
+        ("6.3.0", (6, 3, 0)),
+        ("6.3.0rc1", (6, 3, 0)),
+        ("7.0.0.dev1", (7, 0, 0)),
+        ("2.1", (2, 1)),
+    ],
+)
+def test_parse_version(version, expected):
+    """Check that only the numeric release part is compared."""
+    assert flake8_docstrings._parse_version(version) == expected
+
+
+def _parse_options(**kwargs):
+    options = types.SimpleNamespace(
+        docstring_cache=False,
+        docstring_convention="pep257",
+        ignore_decorators=None,
+        ignore_decorators_re2=False,
+        property_decorators="property",
+        ignore_self_only_init=False,
+        select=None,
+        extend_select=None,
+    )
+    vars(options).update(kwargs)
+    flake8_docstrings.pep257Checker.parse_options(options)
+    return flake8_docstrings.pep257Checker
+
+
+@pytest.mark.parametrize(
+    ("select", "extend_select", "expected"),
+    [
+        (None, None, True),
+        ([], None, True),
+        (None, ["E"], True),
+        (["E"], None, False),
+        (["E"], ["D1"], True),
+        (["D4"], None, True),
+    ],
+)
+def test_any_d_selected(select, extend_select, expected):
+    """Check which --select values leave D codes selected."""
+    checker = _parse_options(select=select, extend_select=extend_select)
+    assert checker._any_d_selected is expected
+
+
+def test_legacy_default_select_keeps_d_codes(monkeypatch):
+    """Check that flake8 < 6's default --select still selects D codes."""
+    monkeypatch.setattr(
+        defaults, "SELECT", ("E", "F", "W", "C90"), raising=False
+    )
+    checker = _parse_options(select=["E", "F", "W", "C90"])
+    assert checker._any_d_selected is True
+    checker = _parse_options(select=["E", "F"])
+    assert checker._any_d_selected is False
+
+
+def test_run_skips_check_without_d_codes(monkeypatch):
+    """Check that pydocstyle is not run when no D code is selected."""
+    checker = _parse_options(select=["E"])
+
+    def fail(self):
+        raise AssertionError("check_source called without D codes")
+
+    monkeypatch.setattr(checker, "_call_check_source", fail)
+    assert (
+        list(checker(None, "a.py", ["def f():\n", "    pass\n"]).run()) == []
+    )
+
+
+def test_ignore_decorators_use_re_by_default():
+    """Check that re2 is not used unless it is requested."""
+    pattern = flake8_docstrings._compile_ignore_decorators(r"^\w+$", False)
+    assert isinstance(pattern, re.Pattern)
+    assert pattern.findall("кэш") == ["кэш"]
+
+
+def test_ignore_decorators_use_re2_when_requested():
+    """Check that --ignore-decorators-re2 compiles the pattern with re2."""
+    re2 = pytest.importorskip("re2")
+    pattern = flake8_docstrings._compile_ignore_decorators("^prop", True)
+    assert type(pattern).__module__ == re2.__name__
+    assert pattern.findall("property") == ["prop"]
+
+
+def test_ignore_decorators_re2_falls_back_to_re():
+    """Check that patterns re2 rejects are compiled with re instead."""
+    pytest.importorskip("re2")
+    pattern = flake8_docstrings._compile_ignore_decorators(r"(a)\1", True)
+    assert isinstance(pattern, re.Pattern)
+    assert pattern.findall("aa") == ["a"]
+
+
+def test_re2_is_imported_lazily():
+    """Check that importing the plugin does not import re2."""
+    code = "import sys, flake8_docstrings; print('re2' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert output.strip() == "False"